@@ -0,0 +1,297 @@
+import argparse
+import csv
+import json
+import os
+
+# Streaming post-processing for sweep results, replacing aggregate.py, generate_graphs.py and statistical_testing.py.
+#
+# Each strategy's per-run CSV (*_final.csv) is read line by line from where the previous batch stopped, and folded
+# into a running mean / variance per (U, R, C, S_max, V_max) group. The per-file group state and read offsets are
+# kept in a state file, so a re-run after the sweep appended rows only reads the new rows, and the aggregated CSVs,
+# statistical tests and graphs are only rebuilt when some group actually changed.
+#
+#   python Results/pipeline.py
+#   python Results/pipeline.py --input "GWO BPSO=Results/experiment_results_final.csv" --input Greedy=Results/greedy_results_final.csv
+#   python Results/pipeline.py --input "GWO BPSO=experiment_results_<base_seed>.csv"      (a sweep while it runs)
+
+GROUP_COLUMNS = ["U", "R", "C", "S_max", "V_max"]
+MIN_COMMON_GROUPS = 2   # configurations the strategies need in common before they are compared
+METRIC_COLUMNS = ["avg_total_latency", "avg_total_no_placement", "dropped_requests", "successfully_served_requests"]
+
+DEFAULT_INPUTS = [
+    "Random=Results/random_results_final.csv",
+    "GWO BPSO=Results/experiment_results_final.csv",
+    "Greedy=Results/greedy_results_final.csv",
+]
+
+class RunningStats:
+    # Welford's running mean and variance, mergeable with Chan's parallel update
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def to_list(self):
+        return [self.n, self.mean, self.m2]
+
+class GroupedAggregator:
+    def __init__(self, groups=None):
+        # group key (tuple of GROUP_COLUMNS values) -> {metric: RunningStats}
+        self.groups = groups if groups is not None else {}
+
+    def add_row(self, row):
+        # returns the key of the group the row went into, or None when the run produced no latency (like dropna before)
+        if row.get("avg_total_latency") in (None, ""):
+            return None
+        key = tuple(parse_number(row[column]) for column in GROUP_COLUMNS)
+        stats = self.groups.setdefault(key, {metric: RunningStats() for metric in METRIC_COLUMNS})
+        for metric in METRIC_COLUMNS:
+            if row.get(metric) not in (None, ""):
+                stats[metric].add(float(row[metric]))
+        return key
+
+    def merge(self, other):
+        for key, other_stats in other.groups.items():
+            stats = self.groups.setdefault(key, {metric: RunningStats() for metric in METRIC_COLUMNS})
+            for metric in METRIC_COLUMNS:
+                stats[metric].merge(other_stats[metric])
+
+    def rows(self):
+        for key in sorted(self.groups):
+            stats = self.groups[key]
+            row = dict(zip(GROUP_COLUMNS, key))
+            for metric in METRIC_COLUMNS:
+                row[metric] = stats[metric].mean if stats[metric].n else None
+            row["n"] = stats["avg_total_latency"].n
+            for metric in METRIC_COLUMNS:
+                row[metric + "_var"] = stats[metric].variance()
+            yield row
+
+    def to_json(self):
+        return [[list(key), {metric: stats[metric].to_list() for metric in METRIC_COLUMNS}] for key, stats in self.groups.items()]
+
+    @classmethod
+    def from_json(cls, data):
+        return cls({tuple(key): {metric: RunningStats(*stats[metric]) for metric in METRIC_COLUMNS} for key, stats in data})
+
+def parse_number(value):
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+def aggregated_path(input_path, output_dir):
+    name = os.path.basename(input_path)
+    stem = name[:-len("_final.csv")] if name.endswith("_final.csv") else os.path.splitext(name)[0]
+    return os.path.join(output_dir, stem + "_aggregated.csv")
+
+def read_new_rows(path, file_state):
+    # reads the complete lines appended since file_state["offset"], a partially written last line is left for next time.
+    # returns (rows, restarted) where restarted means the file was rewritten and has to be aggregated from scratch
+    offset = file_state.get("offset", 0)
+    last_line = file_state.get("last_line", "").encode("utf-8")
+    with open(path, "rb") as f:
+        # the last line consumed must still be where it was, otherwise this is not the file we read before
+        f.seek(max(offset - len(last_line), 0))
+        restarted = offset > 0 and f.read(len(last_line)) != last_line
+        if restarted:
+            file_state.clear()
+            offset = 0
+
+        header = file_state.get("header")
+        rows = []
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            last_line = line
+            values = next(csv.reader([line.decode("utf-8")]), None)
+            if not values:
+                continue
+            if header is None:
+                header = values
+                continue
+            rows.append(dict(zip(header, values)))
+
+    file_state.update({"offset": offset, "header": header, "last_line": last_line.decode("utf-8")})
+    return rows, restarted
+
+def write_aggregated(path, aggregator):
+    columns = GROUP_COLUMNS + METRIC_COLUMNS + ["n"] + [metric + "_var" for metric in METRIC_COLUMNS]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in aggregator.rows():
+            writer.writerow(row)
+
+def common_groups(aggregators):
+    groups = None
+    for aggregator in aggregators.values():
+        groups = set(aggregator.groups) if groups is None else groups & set(aggregator.groups)
+    return groups or set()
+
+def combined_rows(aggregators):
+    # only the configurations every strategy ran (an inner join on GROUP_COLUMNS), so the strategies are compared
+    # on the same configuration set. the baselines cover 32 of the 1,024 GWO BPSO configurations, which is the
+    # subset experiment_results_filtered.csv held for the old scripts
+    groups = common_groups(aggregators)
+    for strategy, aggregator in aggregators.items():
+        for row in aggregator.rows():
+            if tuple(row[column] for column in GROUP_COLUMNS) in groups:
+                row["Experiment"] = strategy
+                yield row
+
+def run_statistical_tests(aggregators, path, dropped_cutoff):
+    # one-way ANOVA and Tukey HSD on dropped requests across strategies, as statistical_testing.py did
+    import pandas as pd
+    import statsmodels.api as sm
+    from statsmodels.formula.api import ols
+    from statsmodels.stats.multicomp import pairwise_tukeyhsd
+
+    combined_df = pd.DataFrame(list(combined_rows(aggregators)))
+    combined_df = combined_df[combined_df["dropped_requests"] < dropped_cutoff]
+    num_strategies = combined_df["Experiment"].nunique()
+    if num_strategies < 2 or len(combined_df) <= num_strategies:
+        print(f"Skipping statistical tests: too few configurations left below {dropped_cutoff} dropped requests")
+        return
+
+    model = ols('dropped_requests ~ Experiment', data=combined_df).fit()
+    anova_table = sm.stats.anova_lm(model, typ=2)
+    tukey = pairwise_tukeyhsd(endog=combined_df['dropped_requests'],
+                              groups=combined_df['Experiment'],
+                              alpha=0.05)
+
+    with open(path, "w") as f:
+        f.write("ANOVA Results:\n" + str(anova_table) + "\n\n")
+        f.write("Tukey HSD Post-Hoc Test:\n" + str(tukey) + "\n")
+    print(f"Statistical tests written to {path}")
+
+def plot_latency_comparison(aggregators, path, latency_cutoff):
+    # latency vs R and vs C per strategy, as generate_graphs.py did, rendered headless
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    combined_df = pd.DataFrame(list(combined_rows(aggregators)))
+
+    # Filter out rows with very large latency values (likely outliers or errors)
+    combined_df = combined_df[combined_df["avg_total_latency"] < latency_cutoff]
+
+    fig, axs = plt.subplots(1, 2, figsize=(14, 5), sharey=True)
+
+    sns.lineplot(data=combined_df, x="R", y="avg_total_latency", hue="Experiment", marker="o", ax=axs[0])
+    axs[0].set_title("Latency vs Arrival Rate (R)")
+    axs[0].set_xlabel("Arrival Rate (R)")
+    axs[0].set_ylabel("Average Latency (s)")
+    axs[0].grid(True)
+
+    sns.lineplot(data=combined_df, x="C", y="avg_total_latency", hue="Experiment", marker="o", ax=axs[1])
+    axs[1].set_title("Latency vs Max VNFs per UAV (C)")
+    axs[1].set_xlabel("Max VNFs per UAV (C)")
+    axs[1].set_ylabel("Average Latency (s)")
+    axs[1].grid(True)
+
+    plt.suptitle("Average Latency Comparisons by Experiment", fontsize=16)
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    plt.savefig(path)
+    plt.close(fig)
+    print(f"Graph written to {path}")
+
+def run_pipeline(inputs, output_dir="Results", graphs_dir="Graphs", state_path=None, latency_cutoff=100,
+                 dropped_cutoff=5, force=False):
+    # inputs is a list of (strategy, csv path)
+    state_path = state_path or os.path.join(output_dir, ".pipeline_state.json")
+    state = {}
+    if os.path.exists(state_path) and not force:
+        with open(state_path) as f:
+            state = json.load(f)
+    file_states = state.setdefault("files", {})
+
+    aggregators = {}
+    changed_strategies = set()
+    for strategy, path in inputs:
+        file_state = file_states.setdefault(path, {})
+        file_groups = GroupedAggregator.from_json(file_state.get("groups", []))
+
+        rows, restarted = read_new_rows(path, file_state)
+        if restarted:
+            file_groups = GroupedAggregator()
+
+        changed_groups = {file_groups.add_row(row) for row in rows} - {None}
+        file_state["groups"] = file_groups.to_json()
+        if changed_groups or restarted or force:
+            changed_strategies.add(strategy)
+        print(f"{strategy}: {len(rows)} new rows from {path}, {len(changed_groups)} groups changed")
+
+        aggregators.setdefault(strategy, GroupedAggregator()).merge(file_groups)
+
+    outputs = {}
+    for strategy, path in inputs:
+        outputs.setdefault(strategy, aggregated_path(path, output_dir))
+    for strategy in changed_strategies:
+        write_aggregated(outputs[strategy], aggregators[strategy])
+        print(f"Aggregated {strategy} written to {outputs[strategy]}")
+
+    # saved before the comparisons, so a failure there does not throw away the offsets and re-read everything
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+
+    if not changed_strategies:
+        print("No new results, outputs are up to date.")
+        return
+
+    num_common = len(common_groups(aggregators))
+    if len(aggregators) < 2:
+        print("Skipping statistical tests and graph: only one strategy, pass another with --input to compare")
+        return
+    if num_common < MIN_COMMON_GROUPS:
+        print(f"Skipping statistical tests and graph: the strategies have {num_common} configurations in common, "
+              f"comparing them needs at least {MIN_COMMON_GROUPS}")
+        return
+
+    print(f"Comparing strategies on the {num_common} configurations they all ran")
+    run_statistical_tests(aggregators, os.path.join(output_dir, "statistical_tests.txt"), dropped_cutoff)
+    plot_latency_comparison(aggregators, os.path.join(graphs_dir, "latency_comp_by_experiment.png"), latency_cutoff)
+
+def parse_input(value):
+    strategy, separator, path = value.partition("=")
+    if not separator or not strategy or not path:
+        raise argparse.ArgumentTypeError(f"Expected STRATEGY=PATH, got '{value}'")
+    return strategy, path
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate sweep results and rebuild statistics and graphs for changed groups.")
+    parser.add_argument("--input", action="append", type=parse_input,
+                        help="STRATEGY=PATH of a per-run results CSV, may be repeated")
+    parser.add_argument("--output-dir", default="Results")
+    parser.add_argument("--graphs-dir", default="Graphs")
+    parser.add_argument("--state", default=None, help="state file, defaults to OUTPUT_DIR/.pipeline_state.json")
+    parser.add_argument("--latency-cutoff", type=float, default=100, help="graphs drop groups with mean latency above this")
+    parser.add_argument("--dropped-cutoff", type=float, default=5, help="statistical tests drop groups dropping this many requests")
+    parser.add_argument("--force", action="store_true", help="ignore the saved state and re-aggregate everything")
+    args = parser.parse_args()
+
+    inputs = args.input or [parse_input(value) for value in DEFAULT_INPUTS]
+    run_pipeline(inputs, args.output_dir, args.graphs_dir, args.state, args.latency_cutoff, args.dropped_cutoff, args.force)
+
+if __name__ == "__main__":
+    main()
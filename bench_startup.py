@@ -0,0 +1,53 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Measures the cold-start cost of a sweep worker: a fresh interpreter importing the core simulation modules.
+# Also checks that none of the analysis libraries get pulled in at import time, they belong at the output boundary.
+#
+#   python bench_startup.py            (exits 1 if a heavy module is imported eagerly)
+
+MODULES = ["environment", "sims", "main"]
+HEAVY_MODULES = ["pandas", "matplotlib", "seaborn", "statsmodels", "scipy", "sqlite3"]
+REPEATS = 10
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+def time_import(module, repeats=REPEATS):
+    # returns (median in-process import time, median wall time of the whole interpreter run, heavy modules loaded)
+    import_times = []
+    wall_times = []
+    loaded = set()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=here, capture_output=True, text=True, check=True).stdout.splitlines()
+        wall_times.append(time.perf_counter() - start)
+        import_times.append(float(output[0]))
+        loaded.update(name for name in output[1].split(",") if name)
+    return statistics.median(import_times), statistics.median(wall_times), sorted(loaded)
+
+def main():
+    failed = False
+    baseline_import, baseline_wall, _ = time_import("numpy")
+    print(f"{'numpy (baseline)':<18} import {baseline_import * 1000:7.1f} ms   interpreter {baseline_wall * 1000:7.1f} ms")
+
+    for module in MODULES:
+        import_time, wall_time, loaded = time_import(module)
+        print(f"{module:<18} import {import_time * 1000:7.1f} ms   interpreter {wall_time * 1000:7.1f} ms"
+              + (f"   eagerly imports {', '.join(loaded)}" if loaded else ""))
+        failed = failed or bool(loaded)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -15,6 +15,10 @@ PARAMS = {
     "deltaT": 1,            # timestep 
     "BW_max_user_uav": 50,  # mbps
     "BW_max_uav_hap": 500,  # mbps
+    "fitness_dtype": "float64",  # precision of the optimiser fitness kernels ("float32" halves their memory traffic)
+    "demand_cell_size": None,    # metres, bin requests into weighted demand points for fitness (None = exact)
+    "islands": 1,                # worker processes one GWO / PSO run is split over (1 = run in this process)
+    "migration_interval": 5,     # iterations between best-solution exchanges across islands
     "latency_coeffs": {
         "alpha1": 0.1, "alpha2": 0.2,   #temp - change these
         "beta1": 0.3, "beta2": 0.000005,
@@ -94,3 +98,13 @@ def bandwidth(distance, link_type):
     # apply formula
     bandwidth = BW_max * (1 - (distance / R_max))
     return bandwidth
+
+def vnf_bitmask(vnfs):
+    # packs a collection of VNF ids (0-15) into a single integer, bit i set when VNF i is requested
+    mask = 0
+    for vnf_id in vnfs:
+        mask |= 1 << int(vnf_id)
+    return mask
+
+def vnfs_from_bitmask(mask):
+    return [vnf_id for vnf_id in range(16) if int(mask) >> vnf_id & 1]
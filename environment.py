@@ -1,16 +1,57 @@
 import numpy as np
-import random
 from collections import deque
 from classes import UAV
 from classes import HAP
 from classes import UserRequest
 from classes import PARAMS
-from classes import bandwidth, distance
-from optimisation import PSO
-from optimisation import GWO
+from classes import bandwidth, distance, vnf_bitmask, vnfs_from_bitmask
+
+def assign_requests(uav_positions, uav_vnf_masks, uav_active, uav_ranges, uav_capacities,
+                    request_positions, request_vnf_masks, demands):
+    # assigns every request to the nearest active, in-range UAV hosting all its VNFs with spare capacity
+    # returns the index of the chosen UAV per request, or -1 when no UAV can take it
+    num_requests = len(request_positions)
+    assignment = np.full(num_requests, -1)
+    if num_requests == 0 or len(uav_positions) == 0:
+        return assignment
+
+    diff = request_positions[:, np.newaxis, :] - uav_positions[np.newaxis, :, :]
+    dists = np.sqrt(np.sum(diff ** 2, axis=2))
+
+    # enforcing constraint 2.15, the assignment range constraint and VNF availability (constraint 2.12)
+    feasible = (uav_active[np.newaxis, :] &
+                (dists <= uav_ranges[np.newaxis, :]) &
+                ((request_vnf_masks[:, np.newaxis] & ~uav_vnf_masks[np.newaxis, :]) == 0))
+
+    ranked = np.where(feasible, dists, np.inf)
+    nearest = np.argmin(ranked, axis=1)
+
+    # capacity (constraint 2.14) depends on earlier assignments, so requests are settled in order.
+    # usually the nearest feasible UAV still has room, only when it is full are the other candidates ranked
+    load = np.zeros(len(uav_positions))
+    for r in range(num_requests):
+        uav_idx = nearest[r]
+        if not feasible[r, uav_idx]:
+            continue
+
+        if load[uav_idx] + demands[r] > uav_capacities[uav_idx]:
+            uav_idx = -1
+            for candidate in np.argsort(ranked[r], kind="stable"):
+                if not feasible[r, candidate]:
+                    break
+                if load[candidate] + demands[r] <= uav_capacities[candidate]:
+                    uav_idx = candidate
+                    break
+            if uav_idx < 0:
+                continue
+
+        load[uav_idx] += demands[r]
+        assignment[r] = uav_idx
+
+    return assignment
 
 class SimulationEnvironment:
-    def __init__(self):
+    def __init__(self, seed=None, record_trace=None, replay_trace=None):
         self.uavs = []  # set of all UAVs
         self.haps = []  # set of all HAPs
         self.user_requests = [] # set of all generated requests
@@ -21,29 +62,80 @@ class SimulationEnvironment:
         self.latency_records = []   # record for analysis
         self.active_request_log = []
 
+        # independent random streams per purpose, so that two environments built from the same seed
+        # share topology and request trace even when their optimisers consume randomness differently
+        self.seed_sequence = np.random.SeedSequence(seed)
+        topology_seed, workload_seed, optimiser_seed = self.seed_sequence.spawn(3)
+        self.topology_rng = np.random.default_rng(topology_seed)
+        self.workload_rng = np.random.default_rng(workload_seed)
+        self.optimiser_rng = np.random.default_rng(optimiser_seed)
+
+        # optional workload trace: record the generated request stream to a file, or replay one instead of generating
+        self.workload_step = 0
+        self.trace_writer = None
+        self.trace_reader = None
+        if record_trace or replay_trace:
+            from workload_trace import TraceReader, TraceWriter
+            self.trace_writer = TraceWriter(record_trace) if record_trace else None
+            self.trace_reader = TraceReader(replay_trace) if replay_trace else None
+
         self.initialize_network()
 
+    def close(self):
+        # finishes a recorded workload trace, safe to call more than once. callers driving generate_user_requests
+        # themselves instead of run_simulation need to call this (or use the environment as a context manager)
+        if self.trace_writer is not None:
+            self.trace_writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def initialize_network(self):
         # create HAPs
         self.haps.append(HAP(hap_id=0, position=(0, 0, 20000)))
 
         # create UAVs
         for i in range(self.no_uavs):
-            position = (random.uniform(-25000, 25000), random.uniform(-50000, 50000), 9000)
+            position = (float(self.topology_rng.uniform(-25000, 25000)), float(self.topology_rng.uniform(-50000, 50000)), 9000)
             self.uavs.append(UAV(uav_id=i, position=position))
     
-    def generate_user_requests(self):
-        num_requests = np.random.poisson(self.lambda_arrival_rate)
-        print("Number of requests: " + str(num_requests))
+    def draw_user_requests(self, step=None):
+        # returns the (position, requested_vnfs, ttl) of the requests arriving at step (by default the current one).
+        # only touches the workload stream / trace reader, so it can run ahead of the rest of the simulation
+        if self.trace_reader is not None:
+            batch = self.trace_reader.step(self.workload_step if step is None else step)
+            return [((float(record["x"]), float(record["y"]), 0), vnfs_from_bitmask(record["vnfs"]), int(record["ttl"])) for record in batch]
+
+        num_requests = int(self.workload_rng.poisson(self.lambda_arrival_rate))
+        arrivals = []
         for i in range(num_requests):
-            position = (random.uniform(-25000, 25000), random.uniform(-25000, 25000), 0)
+            position = (float(self.workload_rng.uniform(-25000, 25000)), float(self.workload_rng.uniform(-25000, 25000)), 0)
+            requested_vnfs = self.workload_rng.choice(10, size=self.workload_rng.integers(1, 4), replace=False).tolist()
+            ttl = int(self.workload_rng.integers(3, 7))
+            arrivals.append((position, requested_vnfs, ttl))
+        return arrivals
+
+    def generate_user_requests(self, arrivals=None):
+        # commits this step's arrivals as UserRequests, drawing them first unless they were prefetched
+        if arrivals is None:
+            arrivals = self.draw_user_requests()
+        num_requests = len(arrivals)
+        print("Number of requests: " + str(num_requests))
+        for position, requested_vnfs, ttl in arrivals:
             print(position)
-            requested_vnfs = random.sample(range(10), random.randint(1, 3))
-            ttl = random.randint(3,6)
             new_request = UserRequest(request_id=len(self.user_requests), user_position=position, requested_vnfs=requested_vnfs, ttl=ttl)
 
             self.user_requests.append(new_request)
             self.pending_requests.append(new_request)
+
+        if self.trace_writer is not None:
+            self.trace_writer.record_step([position for position, _, _ in arrivals],
+                                          [vnf_bitmask(vnfs) for _, vnfs, _ in arrivals],
+                                          [ttl for _, _, ttl in arrivals])
+        self.workload_step += 1
         return num_requests
     
     def decay_requests(self):
@@ -63,13 +155,15 @@ class SimulationEnvironment:
         return len(active_ids)
 
     def optimise_network(self):
-        # calls GWO
-        gwo_optimiser = GWO(self.uavs, self.haps, self.user_requests)
+        # calls GWO, optimisation is imported here so that loading the environment stays cheap
+        from optimisation import GWO
+        gwo_optimiser = GWO(self.uavs, self.haps, self.user_requests, rng=self.optimiser_rng)
         return gwo_optimiser.optimise()
     
     def optimise_vnfs(self):
         # calls PSO
-        pso_optimiser = PSO(self.uavs, self.haps, self.user_requests)
+        from optimisation import PSO
+        pso_optimiser = PSO(self.uavs, self.haps, self.user_requests, rng=self.optimiser_rng)
         return pso_optimiser.optimise()
 
     def reassign_users_after_optimisation(self):
@@ -79,36 +173,25 @@ class SimulationEnvironment:
             uav.connected_users.clear()
             uav.current_load = 0  # reset load to reassign properly
 
-        reassigned_requests = []
+        if not self.user_requests:
+            print("Successfully reassigned 0 users.")
+            return
+
+        assignment = assign_requests(
+            uav_positions=np.array([uav.position for uav in self.uavs], dtype=float).reshape(-1, 3),
+            uav_vnf_masks=np.array([vnf_bitmask(uav.active_vnfs) for uav in self.uavs], dtype=np.int64),
+            uav_active=np.array([uav.is_active for uav in self.uavs], dtype=bool),
+            uav_ranges=np.array([uav.communication_range for uav in self.uavs], dtype=float),
+            uav_capacities=np.array([uav.max_capacity for uav in self.uavs], dtype=float),
+            request_positions=np.array([request.user_position for request in self.user_requests], dtype=float),
+            request_vnf_masks=np.array([vnf_bitmask(request.requested_vnfs) for request in self.user_requests], dtype=np.int64),
+            demands=np.array([request.demand for request in self.user_requests], dtype=float)
+        )
 
-        for request in self.user_requests:
-            best_uav = None
-            best_distance = float('inf')
-
-            # enforcing constraint 2.15
-            for uav in self.uavs:
-                if not uav.is_active:
-                    continue
-
-                 # enforces assignment range constraint
-                if not uav.can_serve_user(request.user_position):
-                    continue
-
-                # enforce VNF availability (constraint 2.12)
-                vnfs_needed = set(request.requested_vnfs)
-                if not vnfs_needed.issubset(uav.active_vnfs):
-                    continue
-
-                # meeting constraint 2.14
-                if uav.current_load + request.demand > uav.max_capacity:
-                    continue
-
-                dist = distance(uav.position, request.user_position)
-                if dist < best_distance:
-                    best_distance = dist
-                    best_uav = uav
-
-            if best_uav:
+        reassigned_requests = []
+        for request, uav_idx in zip(self.user_requests, assignment):
+            if uav_idx >= 0:
+                best_uav = self.uavs[uav_idx]
                 best_uav.connected_users.append(request)
                 best_uav.current_load += request.demand
                 reassigned_requests.append(request.request_id)
@@ -263,20 +346,71 @@ class SimulationEnvironment:
         self.latency_records.extend(processed_latencies)
         return processed_latencies
 
-    def run_simulation(self):
+    def arrival_stream(self, num_steps, prefetcher=None):
+        # yields the arrivals of the next num_steps steps. with a prefetcher the following step is drawn in the
+        # background while the caller processes the current one, one draw at a time so the workload stream is
+        # consumed in the same order as without it
+        if prefetcher is None:
+            for _ in range(num_steps):
+                yield self.draw_user_requests()
+            return
+
+        first_step = self.workload_step
+        pending = prefetcher.submit(self.draw_user_requests, first_step)
+        for i in range(num_steps):
+            arrivals = pending.result()
+            if i + 1 < num_steps:
+                pending = prefetcher.submit(self.draw_user_requests, first_step + i + 1)
+            yield arrivals
+
+    def run_simulation(self, pipeline=False, record_sink=None):
+        # record_sink, if given, is called with each step's latency records as they are produced.
+        # pipeline=True overlaps each step's optimisation with drawing the next step's requests and with handing the
+        # previous step's records to record_sink, each on its own background thread. neither touches the optimiser
+        # or topology streams, so a pipelined run gives the same results as a sequential one with the same seed
         print("--- Simulation Begin ---")
-        # need to repeat this for however many time steps will simulate
-        self.generate_user_requests()
-        self.process_requests()
-        for t in range(self.step):
-            num_requests = self.generate_user_requests()
-            self.decay_requests()
-            self.log_active_requests(time_step=t)
-            if num_requests > 0:
-                self.process_requests()
-            
-            self.active_request_log.append({
-            'time_step': t,
-            'active_request_count': len(self.pending_requests)
-        })
+        prefetcher = flusher = None
+        if pipeline:
+            from concurrent.futures import ThreadPoolExecutor
+            prefetcher = ThreadPoolExecutor(max_workers=1)
+            if record_sink is not None:
+                # a single thread keeps the records reaching the sink in step order
+                flusher = ThreadPoolExecutor(max_workers=1)
+        flushes = []
+
+        def flush(records):
+            if record_sink is None:
+                return
+            if flusher is None:
+                record_sink(records)
+            else:
+                flushes.append(flusher.submit(record_sink, records))
+
+        try:
+            arrivals = self.arrival_stream(self.step + 1, prefetcher)
+
+            # need to repeat this for however many time steps will simulate
+            self.generate_user_requests(next(arrivals))
+            flush(self.process_requests())
+            for t in range(self.step):
+                num_requests = self.generate_user_requests(next(arrivals))
+                self.decay_requests()
+                self.log_active_requests(time_step=t)
+                if num_requests > 0:
+                    flush(self.process_requests())
+
+                self.active_request_log.append({
+                'time_step': t,
+                'active_request_count': len(self.pending_requests)
+            })
+
+            # surfaces any error raised by the sink
+            for pending_flush in flushes:
+                pending_flush.result()
+        finally:
+            for executor in (prefetcher, flusher):
+                if executor is not None:
+                    executor.shutdown(wait=True)
+            # a recorded trace is only readable once its header is written, so also finish it when a run fails
+            self.close()
         
\ No newline at end of file
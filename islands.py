@@ -0,0 +1,163 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from classes import PARAMS
+from optimisation import GWO, PSO
+
+# Island model: one GWO / PSO run split into subpopulations that evolve in separate worker processes.
+# The fitness geometry (UAV positions, demand points, VNFs needed, weights) is placed once in shared memory
+# and mapped read-only by every island. Every migration_interval iterations the islands report their best
+# solutions, and each island receives the best ones found by the other islands.
+
+OPTIMISERS = {"GWO": GWO, "PSO": PSO}
+
+# search parameters copied onto the optimiser rebuilt inside each worker
+SEARCH_ATTRIBUTES = {
+    "GWO": ["max_iter", "stagnation_threshold", "mutation_interval", "noise_strength"],
+    "PSO": ["max_iter", "num_vnfs", "stagnation_threshold", "min_inertia", "mutation_interval"],
+}
+
+class SharedGeometry:
+    def __init__(self, geometry):
+        self.blocks = []
+        self.spec = {}
+        for name, array in geometry.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+def attach_geometry(spec):
+    blocks = []
+    geometry = {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        blocks.append(block)
+        geometry[name] = array
+    return blocks, geometry
+
+def island_worker(conn, kind, spec, settings, seed, population):
+    blocks, geometry = attach_geometry(spec)
+    try:
+        evolve_island(conn, kind, geometry, settings, seed, population)
+    finally:
+        # the optimiser holding views on the shared blocks is gone once evolve_island returns
+        del geometry
+        for block in blocks:
+            block.close()
+        conn.close()
+
+def evolve_island(conn, kind, geometry, settings, seed, population):
+    # population is this island's share of the wolves for GWO, or its number of particles for PSO.
+    # a spawned / forkserver worker imports classes afresh, so the parent's PARAMS (as set by the sweep)
+    # are restored before the fitness kernels read them
+    PARAMS.update(settings["params"])
+    optimiser = OPTIMISERS[kind](None, settings["haps"], None, rng=np.random.default_rng(seed),
+                                 dtype=settings["dtype"], islands=1, geometry=geometry)
+    for attribute in SEARCH_ATTRIBUTES[kind]:
+        setattr(optimiser, attribute, settings[attribute])
+
+    if kind == "GWO":
+        optimiser.start_search(population)
+    else:
+        optimiser.swarm_size = population
+        optimiser.start_search()
+
+    stopped = False
+    conn.send((optimiser.migrants(), stopped))
+
+    while True:
+        command, payload = conn.recv()
+        if command == "evolve":
+            start, stop, migrants = payload
+            if migrants:
+                optimiser.accept_migrants(migrants)
+            for iteration in range(start, stop):
+                if stopped:
+                    break
+                stopped = optimiser.search_step(iteration)
+            conn.send((optimiser.migrants(), stopped))
+        else:
+            conn.send(optimiser.wolves if kind == "GWO" else (optimiser.gbest_score, optimiser.gbest))
+            return
+
+def run_islands(optimiser, wolves=None):
+    # runs the search of optimiser over optimiser.islands worker processes.
+    # returns the final wolves (in UAV order) for GWO, or (gbest_score, gbest) for PSO
+    kind = type(optimiser).__name__
+
+    if kind == "GWO":
+        # every wolf is a UAV, so the pack itself is split and put back together in order at the end
+        num_islands = max(1, min(optimiser.islands, len(wolves) // 3))
+        populations = [[wolves[i] for i in share] for share in np.array_split(np.arange(len(wolves)), num_islands)]
+    else:
+        num_islands = max(1, min(optimiser.islands, optimiser.swarm_size // 2))
+        populations = [len(share) for share in np.array_split(np.arange(optimiser.swarm_size), num_islands)]
+
+    settings = {attribute: getattr(optimiser, attribute) for attribute in SEARCH_ATTRIBUTES[kind]}
+    settings["haps"] = optimiser.haps
+    settings["dtype"] = optimiser.dtype.str
+    settings["params"] = dict(PARAMS)
+    seeds = optimiser.rng.integers(0, 2**63, size=num_islands)
+
+    print(f"{kind} running as {num_islands} islands, migrating every {optimiser.migration_interval} iterations")
+
+    geometry = SharedGeometry(optimiser.geometry)
+    context = multiprocessing.get_context()
+    processes = []
+    connections = []
+    try:
+        for island in range(num_islands):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=island_worker, daemon=True,
+                                      args=(child_conn, kind, geometry.spec, settings, seeds[island], populations[island]))
+            process.start()
+            child_conn.close()
+            processes.append(process)
+            connections.append(parent_conn)
+
+        reports = [conn.recv() for conn in connections]
+        best_latencies = [min(migrant[0] for migrants, _ in reports for migrant in migrants)]
+
+        iteration = 0
+        while iteration < optimiser.max_iter:
+            if all(stopped for _, stopped in reports):
+                print(f"Early stopping at iteration {iteration} due to stagnation on every island.")
+                break
+
+            stop = min(iteration + optimiser.migration_interval, optimiser.max_iter)
+            for island, conn in enumerate(connections):
+                incoming = [migrant for other, (migrants, _) in enumerate(reports) if other != island for migrant in migrants]
+                incoming = sorted(incoming, key=lambda migrant: migrant[0])[:3]
+                conn.send(("evolve", (iteration, stop, incoming)))
+
+            reports = [conn.recv() for conn in connections]
+            best_latencies.append(min(migrant[0] for migrants, _ in reports for migrant in migrants))
+            iteration = stop
+
+        for conn in connections:
+            conn.send(("finish", None))
+        results = [conn.recv() for conn in connections]
+    finally:
+        for conn in connections:
+            conn.close()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        geometry.close()
+
+    optimiser.best_latencies = best_latencies
+    if kind == "GWO":
+        return [wolf for island_wolves in results for wolf in island_wolves]
+
+    optimiser.gbest_score, optimiser.gbest = min(results, key=lambda result: result[0])
+    return optimiser.gbest_score, optimiser.gbest
@@ -1,15 +1,19 @@
-import pandas as pd
+import csv
 from environment import SimulationEnvironment
 
+LATENCY_COLUMNS = ["request_id", "rcl", "dml", "pl", "prep", "tx", "total", "total_no_placement",
+                   "U", "R", "C", "S_max", "V_max"]
+
 def main():
     # initialise environment, HAPS and UAVs
     print("Beginning simulation...")
     s1 = SimulationEnvironment()
-    
-    # begin simulation
-    s1.run_simulation()
-    latency_df = pd.DataFrame(s1.latency_records)
-    latency_df.to_csv("simulation_latency_results1.csv", index=False)
+
+    # begin simulation, each step's latency records are written out in the background while the next step runs
+    with open("simulation_latency_results1.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=LATENCY_COLUMNS)
+        writer.writeheader()
+        s1.run_simulation(pipeline=True, record_sink=writer.writerows)
 
 if __name__ == "__main__":
     main()
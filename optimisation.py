@@ -1,19 +1,78 @@
 from math import exp
-import random
 import numpy as np
-from classes import PARAMS, bandwidth, distance
+from classes import PARAMS, bandwidth, distance, vnf_bitmask
 import time
 
+def aggregate_demand(requests, cell_size, num_vnfs=10):
+    # collapses requests sharing a cell_size x cell_size ground cell and the same set of VNFs into one
+    # demand point at their centroid, weighted by how many requests it stands for.
+    # with cell_size None (or 0) every request is its own point, which is the exact evaluation.
+    # returns (positions (K, 3), vnfs_needed (K, num_vnfs), weights (K,))
+    positions = np.array([req.user_position for req in requests], dtype=np.float64).reshape(-1, 3)
+    vnf_masks = np.array([vnf_bitmask(req.requested_vnfs) for req in requests], dtype=np.int64)
+
+    if cell_size and len(requests):
+        cells = np.floor(positions[:, :2] / cell_size).astype(np.int64)
+        keys = np.column_stack([cells, vnf_masks])
+        _, point_idx = np.unique(keys, axis=0, return_inverse=True)
+        point_idx = point_idx.reshape(-1)
+
+        weights = np.bincount(point_idx).astype(np.float64)
+        positions = np.column_stack([np.bincount(point_idx, weights=positions[:, axis]) / weights for axis in range(3)])
+        vnf_masks = np.zeros(len(weights), dtype=np.int64)
+        vnf_masks[point_idx] = keys[:, 2]
+    else:
+        weights = np.ones(len(requests))
+
+    vnfs_needed = ((vnf_masks[:, np.newaxis] >> np.arange(num_vnfs)) & 1).astype(np.int8)
+    return positions, vnfs_needed, weights
+
+def membership_matrix(rows, cols, shape):
+    # boolean matrix with True at every (rows[i], cols[i])
+    matrix = np.zeros(shape, dtype=bool)
+    matrix[np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)] = True
+    return matrix
+
+def build_geometry(uavs, requests, cell_size, dtype, num_vnfs=10):
+    # the read-only arrays the fitness kernels work from, fixed for the whole of one optimisation
+    user_positions, vnfs_needed, demand_weights = aggregate_demand(requests, cell_size, num_vnfs)
+    return {
+        "uav_positions": np.array([uav.position for uav in uavs], dtype=dtype).reshape(-1, 3),
+        "user_positions": user_positions.astype(dtype),
+        "vnfs_needed": vnfs_needed,
+        "demand_weights": demand_weights
+    }
+
 class GWO:
-    def __init__(self, uavs, haps, requests):
+    def __init__(self, uavs, haps, requests, rng=None, dtype=None, cell_size=None, islands=None, geometry=None):
         self.uavs = uavs
         self.haps = haps
         self.requests = requests
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.max_iter = 100
+
+        # distance / bandwidth / latency kernels run in this precision, the final sum is always float64
+        self.dtype = np.dtype(dtype if dtype is not None else PARAMS["fitness_dtype"])
+        self.hap_position = np.array(haps[0].position, dtype=self.dtype)
+
+        # fitness is scored against weighted demand points, one per request unless demand aggregation is on.
+        # island workers pass in the geometry already built by the parent process
+        self.cell_size = cell_size if cell_size is not None else PARAMS["demand_cell_size"]
+        if geometry is None:
+            geometry = build_geometry(uavs, requests, self.cell_size, self.dtype)
+        self.geometry = geometry
+        self.user_positions = geometry["user_positions"]
+        self.demand_weights = geometry["demand_weights"]
+
         self.stagnation_threshold = 20
         self.mutation_interval = 5
         self.noise_strength = 0.05
 
+        # number of worker processes (subpacks) to split the pack over, see islands.py
+        self.islands = islands if islands is not None else PARAMS["islands"]
+        self.migration_interval = PARAMS["migration_interval"]
+        self.elite = []
+
     def bandwidth_vectorised(self, dists, link_type):
         if link_type == 'user_uav':
             bw_max = PARAMS["BW_max_user_uav"]
@@ -29,14 +88,15 @@ class GWO:
         return bw
 
     def fitness(self, uav_positions):
-        hap_pos = np.array(self.haps[0].position)
-        user_positions = np.array([req.user_position for req in self.requests])
+        hap_pos = self.hap_position
+        user_positions = self.user_positions
+        uav_positions = np.asarray(uav_positions, dtype=self.dtype)
 
-        diff_user_uav = user_positions[:, np.newaxis, :] - np.array(uav_positions)[np.newaxis, :, :]
+        diff_user_uav = user_positions[:, np.newaxis, :] - uav_positions[np.newaxis, :, :]
         dists_user_uav = np.linalg.norm(diff_user_uav, axis=2)
 
-        dists_uav_hap = np.linalg.norm(np.array(uav_positions) - hap_pos, axis=1)
-        dists_uav_hap = np.broadcast_to(dists_uav_hap, (len(self.requests), len(uav_positions)))
+        dists_uav_hap = np.linalg.norm(uav_positions - hap_pos, axis=1)
+        dists_uav_hap = np.broadcast_to(dists_uav_hap, (len(user_positions), len(uav_positions)))
 
         bw_user_uav = self.bandwidth_vectorised(dists_user_uav, 'user_uav')
         bw_uav_hap = self.bandwidth_vectorised(dists_uav_hap, 'uav_hap')
@@ -46,20 +106,27 @@ class GWO:
         rcl = (PARAMS["latency_coeffs"]["alpha1"] * (PARAMS["S"] / bw_user_uav)) + \
               (PARAMS["latency_coeffs"]["alpha2"] * (PARAMS["S"] / bw_uav_hap))
 
-        pl = PARAMS["latency_coeffs"]["gamma1"] * PARAMS["S_max"] + PARAMS["latency_coeffs"]["gamma2"] * (PARAMS["S"] / bw_uav_hap)
-        prep = (PARAMS["latency_coeffs"]["beta1"] * (PARAMS["S"] / bw_uav_hap)) + PARAMS["latency_coeffs"]["beta2"]
+        # the movement term of pl and beta2 of prep are the same for every UAV, they are added per served request below
+        pl = PARAMS["latency_coeffs"]["gamma2"] * (PARAMS["S"] / bw_uav_hap)
+        prep = PARAMS["latency_coeffs"]["beta1"] * (PARAMS["S"] / bw_uav_hap)
         tx = PARAMS["latency_coeffs"]["delta1"] * (PARAMS["S"] / bw_user_uav)
 
         latency_matrix = rcl + pl + prep + tx
         latency_matrix[~valid_links] = np.inf
 
         best_latencies = np.min(latency_matrix, axis=1)
-        best_latencies[np.isinf(best_latencies)] = 1e9
+        served = ~np.isinf(best_latencies)
 
-        return np.sum(best_latencies)
+        # accumulating in float64 and keeping the large constant terms out of the matrix keeps the small
+        # per-UAV differences that rank the wolves intact when the matrix itself is float32
+        constant_latency = PARAMS["latency_coeffs"]["gamma1"] * PARAMS["S_max"] + PARAMS["latency_coeffs"]["beta2"]
+        weights = self.demand_weights
+        return (np.sum(best_latencies[served] * weights[served], dtype=np.float64) +
+                np.sum(weights[served]) * constant_latency +
+                np.sum(weights[~served]) * 1e9)
 
     def update_position(self, current_pos, leader_pos, a):
-        r1, r2 = random.random(), random.random()
+        r1, r2 = self.rng.random(), self.rng.random()
         A = 2 * a * r1 - a
         C = 2 * r2
 
@@ -75,61 +142,80 @@ class GWO:
 
         return tuple(X_leader)
 
-    def optimise(self):
-        print("GWO optimiser has begun")
-        start_time = time.time()
-
-        wolves = [uav.position for uav in self.uavs]
+    def rank(self, wolves):
+        # returns (score, wolf) pairs of the best three wolves, merged with any leaders migrated in from other islands
         fitness_scores = [self.fitness([wolf]) for wolf in wolves]
+        sorted_pairs = sorted(list(zip(fitness_scores, wolves)) + self.elite)
+        return sorted_pairs[:3]
+
+    def start_search(self, wolves):
+        self.wolves = list(wolves)
+        self.leaders = self.rank(self.wolves)
+        self.best_latency = self.leaders[0][0]
+        self.stagnation_counter = 0
+        self.best_latencies = [self.best_latency]
+
+    def search_step(self, iteration):
+        # one hunt of the pack, returns True once the best latency has stagnated
+        a = 2 - (iteration * (2 / self.max_iter))
+        alpha, beta, delta = [wolf for _, wolf in self.leaders]
+
+        new_wolves = []
+        for wolf in self.wolves:
+            X1 = self.update_position(wolf, alpha, a)
+            X2 = self.update_position(wolf, beta, a)
+            X3 = self.update_position(wolf, delta, a)
+
+            new_pos = tuple(np.mean([X1, X2, X3], axis=0))
+            new_wolves.append(new_pos)
+
+        wolves = new_wolves
+
+        # add exploration kick every mutation_interval
+        if iteration % self.mutation_interval == 0 and iteration != 0:
+            wolves = [(pos[0] + self.rng.uniform(-self.noise_strength, self.noise_strength),
+                       pos[1] + self.rng.uniform(-self.noise_strength, self.noise_strength),
+                       pos[2] + self.rng.uniform(-self.noise_strength, self.noise_strength)) for pos in wolves]
+
+        self.wolves = wolves
+        self.leaders = self.rank(self.wolves)
+        prev_best_latency = self.best_latency
+        self.best_latency = self.leaders[0][0]
+
+        self.best_latencies.append(self.best_latency)
+
+        if abs(prev_best_latency - self.best_latency) < 1e-4:
+            self.stagnation_counter += 1
+        else:
+            self.stagnation_counter = 0
 
-        sorted_pairs = sorted(zip(fitness_scores, wolves))
-        fitness_scores_sorted, sorted_wolves = zip(*sorted_pairs)
-        alpha, beta, delta = sorted_wolves[:3]
-        best_latency_now = fitness_scores_sorted[0]
-
-        prev_best_latency = best_latency_now
-        stagnation_counter = 0
-        self.best_latencies = [best_latency_now]
-
-        for iteration in range(self.max_iter):
-            a = 2 - (iteration * (2 / self.max_iter))
-
-            new_wolves = []
-            for wolf in wolves:
-                X1 = self.update_position(wolf, alpha, a)
-                X2 = self.update_position(wolf, beta, a)
-                X3 = self.update_position(wolf, delta, a)
-
-                new_pos = tuple(np.mean([X1, X2, X3], axis=0))
-                new_wolves.append(new_pos)
-
-            wolves = new_wolves
-
-            # add exploration kick every mutation_interval
-            if iteration % self.mutation_interval == 0 and iteration != 0:
-                wolves = [(pos[0] + np.random.uniform(-self.noise_strength, self.noise_strength),
-                           pos[1] + np.random.uniform(-self.noise_strength, self.noise_strength),
-                           pos[2] + np.random.uniform(-self.noise_strength, self.noise_strength)) for pos in wolves]
+        return self.stagnation_counter >= self.stagnation_threshold
 
-            fitness_scores = [self.fitness([wolf]) for wolf in wolves]
-            sorted_pairs = sorted(zip(fitness_scores, wolves))
-            fitness_scores_sorted, sorted_wolves = zip(*sorted_pairs)
-            alpha, beta, delta = sorted_wolves[:3]
-            best_latency_now = fitness_scores_sorted[0]
+    def migrants(self):
+        return list(self.leaders)
 
-            self.best_latencies.append(best_latency_now)
+    def accept_migrants(self, migrants):
+        # leaders from other islands take part in leader selection until the next migration
+        self.elite = list(migrants)
+        self.leaders = sorted(self.leaders + self.elite)[:3]
+        self.best_latency = self.leaders[0][0]
 
-            if abs(prev_best_latency - best_latency_now) < 1e-4:
-                stagnation_counter += 1
-            else:
-                stagnation_counter = 0
+    def optimise(self):
+        print("GWO optimiser has begun")
+        start_time = time.time()
 
-            prev_best_latency = best_latency_now
+        wolves = [uav.position for uav in self.uavs]
+        if self.islands > 1:
+            from islands import run_islands
+            wolves = run_islands(self, wolves)
+        else:
+            self.start_search(wolves)
+            for iteration in range(self.max_iter):
+                if self.search_step(iteration):
+                    print(f"Early stopping at iteration {iteration} due to stagnation.")
+                    break
+            wolves = self.wolves
 
-            if stagnation_counter >= self.stagnation_threshold:
-                print(f"Early stopping at iteration {iteration} due to stagnation.")
-                break
-        
         end_time = time.time()
 
         # move UAVs to final positions
@@ -172,26 +258,45 @@ class GWO:
         return (end_time - start_time)
 
 class PSO:
-    def __init__(self, uavs, haps, requests):
+    def __init__(self, uavs, haps, requests, rng=None, dtype=None, cell_size=None, islands=None, geometry=None):
         self.uavs = uavs
         self.haps = haps
-        self.num_uavs = len(uavs)
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.num_vnfs = 10
         self.max_iter = 100
         self.swarm_size = 50
         self.requests = requests
 
+        # distance / bandwidth / latency kernels run in this precision, the final sum is always float64
+        self.dtype = np.dtype(dtype if dtype is not None else PARAMS["fitness_dtype"])
+        self.hap_position = np.array(haps[0].position, dtype=self.dtype)
+
+        # weighted demand points and the VNFs each one needs, see aggregate_demand
+        self.cell_size = cell_size if cell_size is not None else PARAMS["demand_cell_size"]
+        if geometry is None:
+            geometry = build_geometry(uavs, requests, self.cell_size, self.dtype, self.num_vnfs)
+        self.geometry = geometry
+        self.uav_positions = geometry["uav_positions"]
+        self.user_positions = geometry["user_positions"]
+        self.vnfs_needed = geometry["vnfs_needed"]
+        self.demand_weights = geometry["demand_weights"]
+        self.num_uavs = len(self.uav_positions)
+
         # parameters for better control
         self.stagnation_threshold = 25
         self.min_inertia = 0.4
         self.mutation_interval = 15
 
+        # number of worker processes (subswarms) to split the swarm over, see islands.py
+        self.islands = islands if islands is not None else PARAMS["islands"]
+        self.migration_interval = PARAMS["migration_interval"]
+
     def initialise_swarm(self):
         particles = []
         velocities = []
         for _ in range(self.swarm_size):
-            particle = np.random.randint(0, 2, (self.num_uavs, self.num_vnfs))
-            velocity = np.random.uniform(-1, 1, (self.num_uavs, self.num_vnfs))
+            particle = self.rng.integers(0, 2, (self.num_uavs, self.num_vnfs))
+            velocity = self.rng.uniform(-1, 1, (self.num_uavs, self.num_vnfs))
             particles.append(particle)
             velocities.append(velocity)
         return particles, velocities
@@ -211,10 +316,10 @@ class PSO:
         return bw
 
     def fitness(self, particle):
-        uav_positions = np.array([uav.position for uav in self.uavs])
-        user_positions = np.array([req.user_position for req in self.requests])
-        num_requests = len(self.requests)
-        hap_position = np.array(self.haps[0].position)
+        uav_positions = self.uav_positions
+        user_positions = self.user_positions
+        num_requests = len(user_positions)
+        hap_position = self.hap_position
 
         diff_user_uav = user_positions[:, np.newaxis, :] - uav_positions[np.newaxis, :, :]
         dists_user_uav = np.linalg.norm(diff_user_uav, axis=2)
@@ -227,9 +332,7 @@ class PSO:
 
         particle_vnfs = particle
 
-        vnfs_needed = np.zeros((num_requests, self.num_vnfs))
-        for idx, req in enumerate(self.requests):
-            vnfs_needed[idx, req.requested_vnfs] = 1
+        vnfs_needed = self.vnfs_needed
 
         vnfs_coverage = np.all((vnfs_needed[:, np.newaxis, :] <= particle_vnfs[np.newaxis, :, :]), axis=2)
         valid_links = (dists_user_uav <= PARAMS["R_v"]) & (dists_uav_hap <= PARAMS["R_h"]) & (bw_user_uav > 0) & (bw_uav_hap > 0)
@@ -242,132 +345,155 @@ class PSO:
         best_latencies = np.min(rcl, axis=1)
         best_latencies[np.isinf(best_latencies)] = 1e9
 
-        return np.sum(best_latencies)
+        return np.sum(best_latencies * self.demand_weights, dtype=np.float64)
 
     def sigmoid(self, x):
         return 1 / (1 + np.exp(-x))
 
-    def optimise(self):
-        print("PSO optimiser has begun")
-        start_time = time.time()
-
-        stagnation_counter = 0
+    def start_search(self):
+        self.stagnation_counter = 0
 
-        old_activations = np.zeros((self.num_uavs, self.num_vnfs))
-        for idx, uav in enumerate(self.uavs):
-            for vnf in uav.active_vnfs:
-                old_activations[idx, vnf] = 1
+        self.particles, self.velocities = self.initialise_swarm()
 
-        particles, velocities = self.initialise_swarm()
+        self.pbest = self.particles.copy()
+        self.pbest_scores = [self.fitness(p) for p in self.pbest]
 
-        pbest = particles.copy()
-        pbest_scores = [self.fitness(p) for p in pbest]
+        gbest_idx = np.argmin(self.pbest_scores)
+        self.gbest = self.pbest[gbest_idx]
+        self.gbest_score = self.pbest_scores[gbest_idx]
+        self.prev_best_score = self.gbest_score
 
-        gbest_idx = np.argmin(pbest_scores)
-        gbest = pbest[gbest_idx]
-        gbest_score = pbest_scores[gbest_idx]
-        prev_best_score = gbest_score
+    def search_step(self, iteration):
+        # one flight of the swarm, returns True once the global best has stagnated
+        particles, velocities = self.particles, self.velocities
+        pbest, pbest_scores = self.pbest, self.pbest_scores
 
-        w = 0.9
         c1 = 1.5
         c2 = 1.3
+        w = max(0.9 - (0.5 * iteration / self.max_iter), self.min_inertia)
+
+        for i in range(self.swarm_size):
+            r1, r2 = self.rng.random((self.num_uavs, self.num_vnfs)), self.rng.random((self.num_uavs, self.num_vnfs))
+            velocities[i] = (w * velocities[i] +
+                             c1 * r1 * (pbest[i] - particles[i]) +
+                             c2 * r2 * (self.gbest - particles[i]))
+
+            # enforces constraint 2.21
+            prob = self.sigmoid(velocities[i])
+            random_matrix = self.rng.random((self.num_uavs, self.num_vnfs))
+            particles[i] = (random_matrix < prob).astype(int)
+
+            score = self.fitness(particles[i])
+
+            if score < pbest_scores[i]:
+                pbest[i] = particles[i].copy()
+                pbest_scores[i] = score
+                if score < self.gbest_score:
+                    self.prev_best_score = self.gbest_score
+                    self.gbest = particles[i].copy()
+                    self.gbest_score = score
+
+        particle_std = np.std(np.stack(particles), axis=0)
+        mean_particle_std = np.mean(particle_std)
+        fitness_change = float(abs(self.prev_best_score - self.gbest_score))
+
+        if fitness_change < 1e-3:
+            self.stagnation_counter += 1
+        else:
+            self.stagnation_counter = 0
+
+        if self.stagnation_counter >= self.stagnation_threshold:
+            return True
+
+        if iteration % self.mutation_interval == 0 and iteration != 0:
+            num_mutations = int(0.1 * self.swarm_size)
+            mutation_indices = self.rng.choice(self.swarm_size, num_mutations, replace=False)
+            for idx in mutation_indices:
+                flip_rate = 0.1 if mean_particle_std < 0.05 else 0.05
+                flip = self.rng.random((self.num_uavs, self.num_vnfs)) < flip_rate
+                particles[idx] = np.logical_xor(particles[idx], flip).astype(int)
+
+        return False
+
+    def migrants(self):
+        return [(self.gbest_score, self.gbest)]
+
+    def accept_migrants(self, migrants):
+        # the best migrant replaces the particle with the worst personal best, and the global best if it beats it
+        score, particle = min(migrants, key=lambda migrant: migrant[0])
+        worst = int(np.argmax(self.pbest_scores))
+        if score < self.pbest_scores[worst]:
+            self.particles[worst] = particle.copy()
+            self.pbest[worst] = particle.copy()
+            self.pbest_scores[worst] = score
+        if score < self.gbest_score:
+            self.prev_best_score = self.gbest_score
+            self.gbest = particle.copy()
+            self.gbest_score = score
 
-        for iteration in range(self.max_iter):
-            w = max(0.9 - (0.5 * iteration / self.max_iter), self.min_inertia)
-
-            for i in range(self.swarm_size):
-                r1, r2 = np.random.rand(self.num_uavs, self.num_vnfs), np.random.rand(self.num_uavs, self.num_vnfs)
-                velocities[i] = (w * velocities[i] +
-                                 c1 * r1 * (pbest[i] - particles[i]) +
-                                 c2 * r2 * (gbest - particles[i]))
-
-                # enforces constraint 2.21
-                prob = self.sigmoid(velocities[i])
-                random_matrix = np.random.rand(self.num_uavs, self.num_vnfs)
-                particles[i] = (random_matrix < prob).astype(int)
-
-                score = self.fitness(particles[i])
-
-                if score < pbest_scores[i]:
-                    pbest[i] = particles[i].copy()
-                    pbest_scores[i] = score
-                    if score < gbest_score:
-                        prev_best_score = gbest_score
-                        gbest = particles[i].copy()
-                        gbest_score = score
-
-            particle_std = np.std(np.stack(particles), axis=0)
-            mean_particle_std = np.mean(particle_std)
-            fitness_change = float(abs(prev_best_score - gbest_score))
-
-            if fitness_change < 1e-3:
-                stagnation_counter += 1
-            else:
-                stagnation_counter = 0
+    def optimise(self):
+        print("PSO optimiser has begun")
+        start_time = time.time()
 
-            if stagnation_counter >= self.stagnation_threshold:
-                print(f"Early stopping at iteration {iteration} due to stagnation.")
-                break
+        old_activations = membership_matrix([idx for idx, uav in enumerate(self.uavs) for _ in uav.active_vnfs],
+                                            [vnf for uav in self.uavs for vnf in uav.active_vnfs],
+                                            (self.num_uavs, self.num_vnfs)).astype(int)
 
-            if iteration % self.mutation_interval == 0 and iteration != 0:
-                num_mutations = int(0.1 * self.swarm_size)
-                mutation_indices = np.random.choice(self.swarm_size, num_mutations, replace=False)
-                for idx in mutation_indices:
-                    flip_rate = 0.1 if mean_particle_std < 0.05 else 0.05
-                    flip = np.random.rand(self.num_uavs, self.num_vnfs) < flip_rate
-                    particles[idx] = np.logical_xor(particles[idx], flip).astype(int)
+        if self.islands > 1:
+            from islands import run_islands
+            _, gbest = run_islands(self)
+        else:
+            self.start_search()
+            for iteration in range(self.max_iter):
+                if self.search_step(iteration):
+                    print(f"Early stopping at iteration {iteration} due to stagnation.")
+                    break
+            gbest = self.gbest
 
         end_time = time.time()
 
         # Finalize UAVs
-        new_activations = np.zeros((self.num_uavs, self.num_vnfs))
-        vnf_demand = np.zeros(self.num_vnfs)
-        for request in self.requests:
-            for vnf_id in request.requested_vnfs:
-                vnf_demand[vnf_id] += 1
-
-        # enforces constraint 2.22
-        for idx, uav in enumerate(self.uavs):
-            if not uav.is_active:
-                continue
-            needed_vnfs = set()
-            for user in uav.connected_users:
-                needed_vnfs.update(user.requested_vnfs)
-
-            activated = np.where(gbest[idx] == 1)[0]
-            valid_activated = [vnf for vnf in activated if vnf in needed_vnfs]
-
-            # enforcing constraint 2.13
-            if len(valid_activated) > uav.max_vnfs:
-                valid_activated = random.sample(valid_activated, uav.max_vnfs)
-
-            for vnf_id in valid_activated:
-                new_activations[idx, vnf_id] = 1
-
+        shape = (self.num_uavs, self.num_vnfs)
+        active = np.array([uav.is_active for uav in self.uavs], dtype=bool)
+        max_vnfs = np.array([uav.max_vnfs for uav in self.uavs], dtype=np.int64)
+
+        vnf_demand = np.bincount(np.array([vnf_id for request in self.requests for vnf_id in request.requested_vnfs], dtype=np.int64),
+                                 minlength=self.num_vnfs)
+
+        # enforces constraint 2.22
+        needed_vnfs = membership_matrix([idx for idx, uav in enumerate(self.uavs) for user in uav.connected_users for _ in user.requested_vnfs],
+                                        [vnf for uav in self.uavs for user in uav.connected_users for vnf in user.requested_vnfs],
+                                        shape)
+        valid_activated = (np.asarray(gbest) == 1) & needed_vnfs & active[:, np.newaxis]
+
+        # enforcing constraint 2.13: UAVs over their limit keep a random max_vnfs of their VNFs,
+        # the top max_vnfs of a random key per VNF
+        if np.any(valid_activated.sum(axis=1) > max_vnfs):
+            keys = np.where(valid_activated, self.rng.random(shape), -1.0)
+            ranks = np.argsort(np.argsort(-keys, axis=1), axis=1)
+            valid_activated &= ranks < max_vnfs[:, np.newaxis]
+
+        new_activations = valid_activated.astype(int)
         delta = new_activations - old_activations
-        new_activations_count = np.sum(delta == 1)
+        new_activations_count = np.count_nonzero(delta == 1)
 
         if new_activations_count > PARAMS["A_max"]:
             print(f"New activations ({new_activations_count}) exceed A_max ({PARAMS['A_max']}) - applying limit.")
 
-            new_indices = np.argwhere(delta == 1)
-            new_indices_sorted = sorted(new_indices, key=lambda x: vnf_demand[x[1]], reverse=True)
-
-            allowed = new_indices_sorted[:PARAMS["A_max"]]
-            delta[:] = 0
-            for idx in allowed:
-                delta[idx[0], idx[1]] = 1
+            # keep the A_max new activations of the most requested VNFs
+            new_indices = np.flatnonzero(delta == 1)
+            allowed = new_indices[np.argpartition(-vnf_demand[new_indices % self.num_vnfs], PARAMS["A_max"])[:PARAMS["A_max"]]]
+            delta = np.zeros(shape, dtype=int)
+            delta.flat[allowed] = 1
 
             new_activations = old_activations + delta
             new_activations = np.clip(new_activations, 0, 1)
 
-        for idx, uav in enumerate(self.uavs):
-            if not uav.is_active:
-                continue
-
+        # like activate_vnf, a UAV holds at most max_vnfs, lowest VNF ids first
+        new_activations = (new_activations == 1) & (np.cumsum(new_activations, axis=1) <= max_vnfs[:, np.newaxis])
+        for idx in np.flatnonzero(active):
+            uav = self.uavs[idx]
             uav.active_vnfs.clear()
-            vnf_indices = np.where(new_activations[idx] == 1)[0]
-            for vnf_id in vnf_indices:
-                uav.activate_vnf(vnf_id)
+            uav.active_vnfs.update(np.flatnonzero(new_activations[idx]).tolist())
 
         return end_time - start_time
\ No newline at end of file
@@ -0,0 +1,60 @@
+import copy
+import io
+import contextlib
+import numpy as np
+from environment import SimulationEnvironment
+from classes import PARAMS
+from optimisation import GWO, PSO
+
+# Checks that running the optimiser fitness kernels in float32 picks the same placements as float64.
+# Both precisions start from the same environment and optimiser seed, so any divergence comes from precision alone.
+# VNF placement and the active UAV set must match exactly. GWO ranks wolves whose fitness can differ by less than
+# float32 resolution of the distances, so UAV positions are allowed to drift by a few metres (out of a 150 km range).
+POSITION_TOLERANCE = 5.0    # metres
+
+def run_optimisers(env, dtype, seed):
+    uavs = copy.deepcopy(env.uavs)
+    rng = np.random.default_rng(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        GWO(uavs, env.haps, env.user_requests, rng=rng, dtype=dtype).optimise()
+        PSO(uavs, env.haps, env.user_requests, rng=rng, dtype=dtype).optimise()
+    return uavs
+
+def check_seed(seed, U=100, R=15):
+    PARAMS["U"] = U
+    PARAMS["R"] = R
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = SimulationEnvironment(seed=seed)
+        env.generate_user_requests()
+        for request in env.pending_requests:
+            env.assign_user_to_uav(request)
+
+    uavs_64 = run_optimisers(env, "float64", seed)
+    uavs_32 = run_optimisers(env, "float32", seed)
+
+    mismatches = []
+    for uav_64, uav_32 in zip(uavs_64, uavs_32):
+        drift = np.linalg.norm(np.array(uav_64.position) - np.array(uav_32.position))
+        if drift > POSITION_TOLERANCE:
+            mismatches.append(f"UAV {uav_64.uav_id} position differs by {drift:.3f} m")
+        if uav_64.is_active != uav_32.is_active:
+            mismatches.append(f"UAV {uav_64.uav_id} active {uav_64.is_active} vs {uav_32.is_active}")
+        if set(map(int, uav_64.active_vnfs)) != set(map(int, uav_32.active_vnfs)):
+            mismatches.append(f"UAV {uav_64.uav_id} VNFs {sorted(uav_64.active_vnfs)} vs {sorted(uav_32.active_vnfs)}")
+    return mismatches
+
+def main(seeds=range(5)):
+    failed = False
+    for seed in seeds:
+        mismatches = check_seed(seed)
+        if mismatches:
+            failed = True
+            print(f"Seed {seed}: {len(mismatches)} placement differences between float64 and float32")
+            for mismatch in mismatches:
+                print("   " + mismatch)
+        else:
+            print(f"Seed {seed}: float32 placements match float64")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import os
+import sqlite3
+
+# Indexed SQLite store for sweep results: one row per configuration, one per run (strategy + repeat) and one per
+# processed request. Queries such as latency vs R for C=8 across strategies become index lookups instead of
+# full CSV scans.
+#
+#   python results_store.py import Results/greedy_results_final.csv Greedy      (--replace to re-import)
+#   python results_store.py query R --where C=8
+
+CONFIG_COLUMNS = ["U", "R", "C", "S_max", "V_max"]
+SUMMARY_COLUMNS = ["avg_total_latency", "avg_total_no_placement", "dropped_requests", "successfully_served_requests"]
+LATENCY_COLUMNS = ["request_id", "rcl", "dml", "pl", "prep", "tx", "total", "total_no_placement"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    config_id INTEGER PRIMARY KEY,
+    U INTEGER NOT NULL,
+    R NUMERIC NOT NULL,
+    C INTEGER NOT NULL,
+    S_max NUMERIC NOT NULL,
+    V_max INTEGER NOT NULL,
+    UNIQUE (U, R, C, S_max, V_max)
+);
+CREATE INDEX IF NOT EXISTS configs_R ON configs (R);
+CREATE INDEX IF NOT EXISTS configs_C ON configs (C);
+CREATE INDEX IF NOT EXISTS configs_S_max ON configs (S_max);
+CREATE INDEX IF NOT EXISTS configs_V_max ON configs (V_max);
+
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    config_id INTEGER NOT NULL REFERENCES configs (config_id),
+    strategy TEXT NOT NULL,
+    repeat INTEGER,
+    experiment_id INTEGER,
+    source TEXT,
+    avg_total_latency REAL,
+    avg_total_no_placement REAL,
+    dropped_requests REAL,
+    successfully_served_requests REAL
+);
+CREATE INDEX IF NOT EXISTS runs_strategy_config ON runs (strategy, config_id);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (config_id);
+CREATE INDEX IF NOT EXISTS runs_source ON runs (source, strategy);
+
+CREATE TABLE IF NOT EXISTS latency_records (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    request_id INTEGER,
+    rcl REAL,
+    dml REAL,
+    pl REAL,
+    prep REAL,
+    tx REAL,
+    total REAL,
+    total_no_placement REAL
+);
+CREATE INDEX IF NOT EXISTS latency_records_run ON latency_records (run_id);
+"""
+
+class ResultsStore:
+    def __init__(self, path="Results/results.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.config_ids = {}
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def config_id(self, U, R, C, S_max, V_max):
+        key = (U, R, C, S_max, V_max)
+        if key not in self.config_ids:
+            self.connection.execute("INSERT OR IGNORE INTO configs (U, R, C, S_max, V_max) VALUES (?, ?, ?, ?, ?)", key)
+            row = self.connection.execute(
+                "SELECT config_id FROM configs WHERE U = ? AND R = ? AND C = ? AND S_max = ? AND V_max = ?", key).fetchone()
+            self.config_ids[key] = row[0]
+        return self.config_ids[key]
+
+    def add_run(self, strategy, config, summary, repeat=None, experiment_id=None, latency_records=None, source=None):
+        # config is (U, R, C, S_max, V_max), summary holds SUMMARY_COLUMNS, latency_records are env.latency_records
+        source = os.path.abspath(source) if source else None
+        cursor = self.connection.execute(
+            "INSERT INTO runs (config_id, strategy, repeat, experiment_id, source, " + ", ".join(SUMMARY_COLUMNS) + ") "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.config_id(*config), strategy, repeat, experiment_id, source, *[summary.get(column) for column in SUMMARY_COLUMNS]))
+        run_id = cursor.lastrowid
+
+        if latency_records:
+            self.connection.executemany(
+                "INSERT INTO latency_records (run_id, " + ", ".join(LATENCY_COLUMNS) + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *[record.get(column) for column in LATENCY_COLUMNS]) for record in latency_records])
+        return run_id
+
+    def commit(self):
+        self.connection.commit()
+
+    def source_runs(self, source, strategy):
+        return self.connection.execute("SELECT COUNT(*) FROM runs WHERE source = ? AND strategy = ?",
+                                       (os.path.abspath(source), strategy)).fetchone()[0]
+
+    def remove_source(self, source, strategy):
+        # deletes the runs (and their latency records) that came from source under strategy
+        runs = "SELECT run_id FROM runs WHERE source = ? AND strategy = ?"
+        key = (os.path.abspath(source), strategy)
+        self.connection.execute(f"DELETE FROM latency_records WHERE run_id IN ({runs})", key)
+        self.connection.execute("DELETE FROM runs WHERE source = ? AND strategy = ?", key)
+
+    def import_csv(self, path, strategy, replace=False):
+        # imports a per-run results CSV (experiment_results.csv / *_final.csv), returns the number of runs added.
+        # importing the same file twice would count its runs twice in latency_vs, so that is refused unless
+        # replace is set, which first removes the runs of the earlier import
+        if self.source_runs(path, strategy):
+            if not replace:
+                raise ValueError(f"{path} is already imported as '{strategy}', use replace to import it again")
+            self.remove_source(path, strategy)
+
+        imported = 0
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                config = tuple(parse_number(row[column]) for column in CONFIG_COLUMNS)
+                summary = {column: parse_number(row.get(column)) for column in SUMMARY_COLUMNS}
+                self.add_run(strategy, config, summary, repeat=parse_number(row.get("repeat")),
+                             experiment_id=parse_number(row.get("experiment_id")), source=path)
+                imported += 1
+        self.connection.commit()
+        return imported
+
+    def latency_vs(self, parameter, strategies=None, metric="avg_total_latency", **fixed):
+        # mean of metric per strategy and value of parameter, over runs whose config matches fixed (e.g. C=8).
+        # returns (strategy, parameter value, mean, number of runs) rows
+        for column in [parameter, *fixed]:
+            if column not in CONFIG_COLUMNS:
+                raise ValueError(f"Unknown config parameter: {column}")
+        if metric not in SUMMARY_COLUMNS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        conditions = [f"configs.{column} = ?" for column in fixed]
+        values = list(fixed.values())
+        if strategies:
+            conditions.append("runs.strategy IN (" + ", ".join("?" for _ in strategies) + ")")
+            values.extend(strategies)
+
+        query = (f"SELECT runs.strategy, configs.{parameter}, AVG(runs.{metric}), COUNT(runs.{metric}) "
+                 "FROM configs JOIN runs ON runs.config_id = configs.config_id")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" GROUP BY runs.strategy, configs.{parameter} ORDER BY runs.strategy, configs.{parameter}"
+        return self.connection.execute(query, values).fetchall()
+
+def parse_number(value):
+    if value is None or value == "":
+        return None
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+def main():
+    parser = argparse.ArgumentParser(description="Import sweep results into, and query, the results database.")
+    parser.add_argument("--db", default="Results/results.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import a per-run results CSV")
+    import_parser.add_argument("csv")
+    import_parser.add_argument("strategy")
+    import_parser.add_argument("--replace", action="store_true", help="replace the runs of an earlier import of this CSV")
+
+    query_parser = commands.add_parser("query", help="mean latency against one config parameter")
+    query_parser.add_argument("parameter", choices=CONFIG_COLUMNS)
+    query_parser.add_argument("--where", action="append", default=[], help="PARAM=VALUE filter, may be repeated")
+    query_parser.add_argument("--strategy", action="append", help="only these strategies, may be repeated")
+    query_parser.add_argument("--metric", default="avg_total_latency", choices=SUMMARY_COLUMNS)
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    try:
+        if args.command == "import":
+            try:
+                imported = store.import_csv(args.csv, args.strategy, args.replace)
+            except ValueError as error:
+                parser.error(str(error))
+            print(f"Imported {imported} runs from {args.csv} as '{args.strategy}'.")
+        else:
+            fixed = {}
+            for condition in args.where:
+                column, separator, value = condition.partition("=")
+                if column not in CONFIG_COLUMNS:
+                    parser.error(f"--where {condition}: unknown config parameter '{column}', expected one of {', '.join(CONFIG_COLUMNS)}")
+                if not separator or not value:
+                    parser.error(f"--where {condition}: expected PARAM=VALUE")
+                try:
+                    fixed[column] = parse_number(value)
+                except ValueError:
+                    parser.error(f"--where {condition}: '{value}' is not a number")
+            for strategy, value, mean, count in store.latency_vs(args.parameter, args.strategy, args.metric, **fixed):
+                print(f"{strategy:<12} {args.parameter}={value:<8} {args.metric}={mean} (n={count})")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
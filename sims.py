@@ -1,58 +1,155 @@
-import pandas as pd
+import argparse
+import csv
 import itertools
+import math
+import statistics
+import numpy as np
 from environment import SimulationEnvironment
 from classes import PARAMS
 
-def run_experiments():
+# Define PARAMS you want to vary
+U_values = [100, 300, 500, 700]          # number of UAVs
+R_values = [1, 5, 15, 40]                # request arrival rates
+C_values = [2, 4, 8, 12]                  # max VNFs per UAV
+S_max_values = [30, 60, 90, 120]         # max UAV movement speed
+V_max_values = [10, 40, 100, 200]          # max active UAVs
+
+PARAM_LEVELS = [U_values, R_values, C_values, S_max_values, V_max_values]
+
+DROP_PENALTY = 1e9   # total latency recorded for a dropped request
+
+def latin_hypercube(levels, n_samples, rng):
+    # each parameter axis is cut into n_samples equal strata with exactly one sample per stratum,
+    # the strata are shuffled independently per axis and mapped back onto the discrete levels
+    columns = []
+    for values in levels:
+        strata = (np.arange(n_samples) + rng.random(n_samples)) / n_samples
+        rng.shuffle(strata)
+        columns.append([values[min(int(s * len(values)), len(values) - 1)] for s in strata])
+
+    # several strata can land on the same level, only keep the first occurrence of each point
+    return list(dict.fromkeys(zip(*columns)))
+
+def run_single(U, R, C, S_max, V_max, seed=None, replay_trace=None):
+    # Set the PARAMS dynamically
+    PARAMS["U"] = U
+    PARAMS["R"] = R
+    PARAMS["C"] = C
+    PARAMS["S_max"] = S_max
+    PARAMS["V_max"] = V_max
+
+    # Create environment
+    env = SimulationEnvironment(seed=seed, replay_trace=replay_trace)
+
+    # Run simulation
+    env.run_simulation()
+
+    # Collect latency results
+    if env.latency_records:
+        avg_total_latency = sum(record['total'] for record in env.latency_records) / len(env.latency_records)
+        avg_total_no_placement = sum(record['total_no_placement'] for record in env.latency_records) / len(env.latency_records)
+        dropped_requests = sum(1 for record in env.latency_records if record['total'] >= DROP_PENALTY)
+        success_requests = len(env.latency_records) - dropped_requests
+    else:
+        avg_total_latency = None
+        avg_total_no_placement = None
+        dropped_requests = None
+        success_requests = None
+
+    summary = {
+        'avg_total_latency': avg_total_latency,
+        'avg_total_no_placement': avg_total_no_placement,
+        'dropped_requests': dropped_requests,
+        'successfully_served_requests': success_requests
+    }
+    return summary, env.latency_records
+
+def served_latency(row):
+    # mean latency of the requests a run served, with the drop penalty taken back out of avg_total_latency
+    served = row['successfully_served_requests']
+    dropped = row['dropped_requests']
+    if not served:
+        return None
+    return (row['avg_total_latency'] * (served + dropped) - DROP_PENALTY * dropped) / served
+
+def repeat_uncertainty(rows):
+    # how uncertain a configuration's estimate still is after its repeats: the relative standard error of the
+    # served-request latency plus the standard error of the dropped fraction. both stay bounded, unlike the raw
+    # variance of avg_total_latency, which the drop penalty dominates whenever some repeats drop a request
+    rows = [row for row in rows if row['avg_total_latency'] is not None]
+    uncertainty = 0.0
+
+    latencies = [latency for latency in map(served_latency, rows) if latency is not None]
+    if len(latencies) > 1 and statistics.mean(latencies) > 0:
+        uncertainty += statistics.stdev(latencies) / (statistics.mean(latencies) * math.sqrt(len(latencies)))
+
+    dropped_fractions = [row['dropped_requests'] / (row['dropped_requests'] + row['successfully_served_requests']) for row in rows]
+    if len(dropped_fractions) > 1:
+        uncertainty += statistics.stdev(dropped_fractions) / math.sqrt(len(dropped_fractions))
+    return uncertainty
+
+RESULT_COLUMNS = ['experiment_id', 'U', 'R', 'C', 'S_max', 'V_max', 'repeat',
+                  'avg_total_latency', 'avg_total_no_placement', 'dropped_requests', 'successfully_served_requests']
+
+def run_experiments(design="grid", n_samples=128, num_repeats=1, min_repeats=2, max_repeats=16, keep_fraction=0.5, base_seed=None, replay_trace=None,
+                    results_path=None, store_path='Results/results.db', strategy='GWO BPSO'):
+    # design is one of:
+    #   "grid"  - full factorial over every level, num_repeats each
+    #   "lhs"   - latin hypercube sample of n_samples points, num_repeats each
+    #   "halving" / "lhs_halving" - grid / lhs points with successive halving on repeats:
+    #             every point gets min_repeats, then the keep_fraction of points whose mean is least certain
+    #             (see repeat_uncertainty) get their repeats doubled, until max_repeats
+    # replay_trace replays one recorded workload in every run (R is then taken from the trace, not the sweep)
+    # every run is appended to results_path as soon as it finishes, so Results/pipeline.py can aggregate while the sweep runs
+    # (python Results/pipeline.py --input "GWO BPSO=experiment_results_<base_seed>.csv" ...). by default every sweep gets
+    # its own file named after its base seed, so starting one never overwrites earlier results
+    # runs and their per-request latencies are also written to the results database at store_path under strategy,
+    # store_path=None leaves the database out
     results = []
 
-    # Define PARAMS you want to vary
-    U_values = [100, 300, 500, 700]          # number of UAVs
-    R_values = [1, 5, 15, 40]                # request arrival rates
-    C_values = [2, 4, 8, 12]                  # max VNFs per UAV
-    S_max_values = [30, 60, 90, 120]         # max UAV movement speed
-    V_max_values = [10, 40, 100, 200]          # max active UAVs
+    # repeat k of every configuration is seeded with (base_seed, k) (common random numbers): configurations that
+    # share U fly the same fleet, and configurations that share R see the same request trace. the number of arrivals
+    # per step depends on R, so a different R shifts every later request draw and gives a different trace
+    if base_seed is None:
+        base_seed = np.random.SeedSequence().entropy
+    print(f"Base seed: {base_seed}")
+    if results_path is None:
+        results_path = f"experiment_results_{base_seed}.csv"
 
-    # Number of times to repeat each setting (for averaging)
-    num_repeats = 1
+    if design in ("grid", "halving"):
+        all_combinations = list(itertools.product(*PARAM_LEVELS))
+    elif design in ("lhs", "lhs_halving"):
+        all_combinations = latin_hypercube(PARAM_LEVELS, n_samples, np.random.default_rng(base_seed))
+    else:
+        raise ValueError(f"Unknown sweep design: {design}")
 
-    # Create all combinations
-    all_combinations = list(itertools.product(U_values, R_values, C_values, S_max_values, V_max_values))
+    adaptive = design.endswith("halving")
+    first_repeats = min_repeats if adaptive else num_repeats
 
-    print(f"Total simulations to run: {len(all_combinations) * num_repeats}")
+    print(f"Sweep design '{design}' with {len(all_combinations)} configurations")
+    if not adaptive:
+        print(f"Total simulations to run: {len(all_combinations) * num_repeats}")
 
+    runs = {combination: [] for combination in all_combinations}
     experiment_id = 0
-    for (U, R, C, S_max, V_max) in all_combinations:
-        for repeat in range(num_repeats):
+
+    store = None
+    if store_path:
+        from results_store import ResultsStore
+        store = ResultsStore(store_path)
+        # results_path is rewritten from scratch below, so the runs a previous sweep stored from it go as well
+        store.remove_source(results_path, strategy)
+        store.commit()
+
+    def run_repeats(combination, target_repeats):
+        nonlocal experiment_id
+        U, R, C, S_max, V_max = combination
+        for repeat in range(len(runs[combination]), target_repeats):
 
             print(f"\nRunning experiment {experiment_id}: U={U}, R={R}, C={C}, S_max={S_max}, V_max={V_max} (repeat {repeat+1})")
 
-            # Set the PARAMS dynamically
-            PARAMS["U"] = U
-            PARAMS["R"] = R
-            PARAMS["C"] = C
-            PARAMS["S_max"] = S_max
-            PARAMS["V_max"] = V_max
-
-            # Create environment
-            env = SimulationEnvironment()
-
-            # Run simulation
-            env.run_simulation()
-
-            # Collect latency results
-            if env.latency_records:
-                avg_total_latency = sum(record['total'] for record in env.latency_records) / len(env.latency_records)
-                avg_total_no_placement = sum(record['total_no_placement'] for record in env.latency_records) / len(env.latency_records)
-                dropped_requests = sum(1 for record in env.latency_records if record['total'] >= 1e9)
-                success_requests = len(env.latency_records) - dropped_requests
-            else:
-                avg_total_latency = None
-                avg_total_no_placement = None
-                dropped_requests = None
-                success_requests = None
-
-            results.append({
+            summary, latency_records = run_single(U, R, C, S_max, V_max, seed=[base_seed, repeat], replay_trace=replay_trace)
+            row = {
                 'experiment_id': experiment_id,
                 'U': U,
                 'R': R,
@@ -60,18 +157,66 @@ def run_experiments():
                 'S_max': S_max,
                 'V_max': V_max,
                 'repeat': repeat + 1,
-                'avg_total_latency': avg_total_latency,
-                'avg_total_no_placement': avg_total_no_placement,
-                'dropped_requests': dropped_requests,
-                'successfully_served_requests': success_requests
-            })
+                **summary
+            }
+            runs[combination].append(row)
+            results.append(row)
+            writer.writerow(row)
+            results_file.flush()
+
+            if store:
+                store.add_run(strategy, combination, summary, repeat=repeat + 1, experiment_id=experiment_id,
+                              latency_records=latency_records, source=results_path)
+                store.commit()
 
             experiment_id += 1
 
-    # Save to CSV
-    df = pd.DataFrame(results)
-    df.to_csv('experiment_results.csv', index=False)
-    print("\n✅ All experiments completed! Results saved to 'experiment_results.csv'.")
+    try:
+        with open(results_path, 'w', newline='') as results_file:
+            writer = csv.DictWriter(results_file, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+
+            for combination in all_combinations:
+                run_repeats(combination, first_repeats)
+
+            if adaptive:
+                candidates = list(all_combinations)
+                repeats = min_repeats
+                while candidates and repeats < max_repeats:
+                    # spend the extra repeats where runs disagree the most
+                    candidates.sort(key=lambda combination: repeat_uncertainty(runs[combination]), reverse=True)
+                    candidates = candidates[:math.ceil(len(candidates) * keep_fraction)]
+                    repeats = min(repeats * 2, max_repeats)
+
+                    print(f"\nSuccessive halving: {len(candidates)} configurations raised to {repeats} repeats")
+                    for combination in candidates:
+                        run_repeats(combination, repeats)
+
+                print(f"Total simulations run: {len(results)} (full grid at {max_repeats} repeats would be {len(all_combinations) * max_repeats})")
+    finally:
+        if store:
+            store.close()
+
+    print(f"\n✅ All experiments completed! Results saved to '{results_path}'.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of the simulation.")
+    parser.add_argument("--design", default="grid", choices=["grid", "lhs", "halving", "lhs_halving"])
+    parser.add_argument("--samples", type=int, default=128, help="latin hypercube points for the lhs designs")
+    parser.add_argument("--repeats", type=int, default=1, help="repeats per point for grid / lhs")
+    parser.add_argument("--min-repeats", type=int, default=2, help="first round of repeats for the halving designs")
+    parser.add_argument("--max-repeats", type=int, default=16, help="repeats the halving designs stop at")
+    parser.add_argument("--base-seed", type=int, default=None)
+    parser.add_argument("--replay-trace", default=None, help="workload trace replayed in every run")
+    parser.add_argument("--results", default=None, help="per-run CSV, defaults to experiment_results_<base seed>.csv")
+    parser.add_argument("--store", default="Results/results.db", help="results database the runs are also written to")
+    parser.add_argument("--no-store", action="store_true", help="only write the CSV")
+    parser.add_argument("--strategy", default="GWO BPSO", help="strategy name the runs are stored under")
+    args = parser.parse_args()
+
+    run_experiments(design=args.design, n_samples=args.samples, num_repeats=args.repeats, min_repeats=args.min_repeats,
+                    max_repeats=args.max_repeats, base_seed=args.base_seed, replay_trace=args.replay_trace,
+                    results_path=args.results, store_path=None if args.no_store else args.store, strategy=args.strategy)
 
 if __name__ == "__main__":
-    run_experiments()
\ No newline at end of file
+    main()
@@ -0,0 +1,83 @@
+import numpy as np
+
+# On-disk layout of a workload trace (all little endian):
+#   header   - TRACE_HEADER, one record
+#   requests - REQUEST_RECORD * num_requests, in arrival order
+#   offsets  - uint64 * (num_steps + 1), requests of step t are requests[offsets[t]:offsets[t + 1]]
+# Offsets go last so the writer can stream requests out as the simulation produces them.
+TRACE_MAGIC = b"UAVTRACE"
+TRACE_VERSION = 1
+
+TRACE_HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("num_steps", "<u4"),
+    ("num_requests", "<u8"),
+])
+
+# users sit on the ground (z = 0), so only x and y are stored
+REQUEST_RECORD = np.dtype([
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("vnfs", "<u2"),    # bitmask of requested VNFs
+    ("ttl", "u1"),
+])
+
+class TraceWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.offsets = [0]
+        self.file.write(np.zeros(1, dtype=TRACE_HEADER).tobytes())   # placeholder until close()
+
+    def record_step(self, positions, vnf_masks, ttls):
+        batch = np.zeros(len(positions), dtype=REQUEST_RECORD)
+        if len(positions):
+            positions = np.asarray(positions, dtype=np.float64)
+            batch["x"] = positions[:, 0]
+            batch["y"] = positions[:, 1]
+            batch["vnfs"] = vnf_masks
+            batch["ttl"] = ttls
+        self.file.write(batch.tobytes())
+        self.offsets.append(self.offsets[-1] + len(batch))
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(np.array(self.offsets, dtype="<u8").tobytes())
+
+        header = np.zeros(1, dtype=TRACE_HEADER)
+        header["magic"] = TRACE_MAGIC
+        header["version"] = TRACE_VERSION
+        header["num_steps"] = len(self.offsets) - 1
+        header["num_requests"] = self.offsets[-1]
+        self.file.seek(0)
+        self.file.write(header.tobytes())
+        self.file.close()
+
+class TraceReader:
+    # memory-maps the trace read-only, parallel workers replaying the same file share its pages
+    # through the OS page cache instead of each holding their own copy
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=TRACE_HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a workload trace")
+        if header["version"][0] != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {header['version'][0]} in {path}")
+
+        self.num_steps = int(header["num_steps"][0])
+        self.num_requests = int(header["num_requests"][0])
+
+        requests_offset = TRACE_HEADER.itemsize
+        offsets_offset = requests_offset + self.num_requests * REQUEST_RECORD.itemsize
+        if self.num_requests:
+            self.requests = np.memmap(path, dtype=REQUEST_RECORD, mode="r", offset=requests_offset, shape=(self.num_requests,))
+        else:
+            self.requests = np.zeros(0, dtype=REQUEST_RECORD)
+        self.offsets = np.memmap(path, dtype="<u8", mode="r", offset=offsets_offset, shape=(self.num_steps + 1,))
+
+    def step(self, step):
+        if step >= self.num_steps:
+            raise ValueError(f"Trace {self.path} only has {self.num_steps} steps, step {step} requested")
+        return self.requests[self.offsets[step]:self.offsets[step + 1]]